@@ -1,20 +1,24 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import os
-from organizer import organize_files 
-from datetime import datetime
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from organizer import organize_files, DEFAULT_HASH_WORKERS
 from pathlib import Path
-
-
-# Import Tkinter for the native dialog
-import tkinter as tk
-from tkinter import filedialog
-import platform
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # --- Tkinter Folder Dialog Function ---
 def ask_for_folder_path():
     """Opens the native OS folder dialog and returns the selected path."""
+    # Imported here so reruns that never open the dialog skip loading Tkinter
+    try:
+        import tkinter as tk
+        from tkinter import filedialog
+    except ImportError:
+        return ""
+    import platform
+
     root = tk.Tk()
     root.withdraw() 
     if platform.system() != 'Linux':
@@ -29,6 +33,151 @@ def ask_for_folder_path():
     return folder_path.replace('\\', '/') if folder_path else ""
 
 
+def can_open_folder_dialog():
+    """Returns True when a native folder dialog can be shown on this machine."""
+    import platform
+    return platform.system() in ('Windows', 'Darwin') or bool(os.environ.get('DISPLAY'))
+
+
+# --- Background Worker ---
+def run_in_script_ctx(ctx, fn, *args):
+    """Attaches the Streamlit script context to the worker thread, then calls fn."""
+    add_script_run_ctx(threading.current_thread(), ctx)
+    return fn(*args)
+
+
+def start_job(fn, *args):
+    """Runs fn on a fresh worker thread carrying this session's script context."""
+    # One executor per job: sessions never queue behind each other, and the thread
+    # exits when the job ends, so no other session's context is left attached to it
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(run_in_script_ctx, get_script_run_ctx(), fn, *args)
+    executor.shutdown(wait=False)
+    return future
+
+
+ORGANIZE_CACHE_TTL_SEC = 60 * 60
+
+
+def evict_expired(store, ttl_sec):
+    """Drops entries whose 'ts' is older than ttl_sec from a cache_resource store."""
+    now = time.time()
+    for key, entry in list(store.items()):
+        if now - entry['ts'] > ttl_sec:
+            store.pop(key, None)
+
+
+def folder_snapshot(path):
+    """Returns a digest of (name, size, mtime_ns) for every top-level entry in path."""
+    snapshot = []
+    with os.scandir(path) as entries:
+        for e in entries:
+            # Don't follow symlinks, and skip entries that can't be stat'ed (organize_files skips them too)
+            try:
+                info = e.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            snapshot.append((e.name, info.st_size, info.st_mtime_ns))
+    # A fixed-size digest keeps cache keys small for large folders
+    return hashlib.sha1(repr(sorted(snapshot)).encode("utf-8")).hexdigest()
+
+
+# show_spinner=False: these stores are reached from the worker thread, which must not emit UI elements
+@st.cache_resource(show_spinner=False)
+def _running_folders() -> set:
+    """Process-wide set of folders an organize job is currently working in."""
+    return set()
+
+
+@st.cache_resource(show_spinner=False)
+def _organize_results() -> dict:
+    """Process-wide map of (path, snapshot digest, mode, dedup) to a finished organize run."""
+    return {}
+
+
+def run_organize(path, mode, dedup, progress_cb, max_workers):
+    """organize_files guarded against re-running on a folder whose contents have not changed.
+
+    Keyed on a snapshot of the folder's entries rather than the folder mtime, so a
+    file arriving within the same mtime tick still counts as a change. The result is
+    stored under the snapshot taken after the run, i.e. the already organized
+    folder, so clicking again without changes returns it instead of re-running.
+    Runs whose log contains errors are not kept, so a retry always organizes again.
+    """
+    store = _organize_results()
+    evict_expired(store, ORGANIZE_CACHE_TTL_SEC)
+
+    try:
+        cached = store.get((path, folder_snapshot(path), mode, dedup))
+        if cached:
+            logs, analytics = cached['result']
+        else:
+            logs, analytics = organize_files(path, mode, dedup, progress_cb, max_workers)
+            if not any(line.startswith("ERROR") for line in logs):
+                store[(path, folder_snapshot(path), mode, dedup)] = {'result': (logs, analytics), 'ts': time.time()}
+        # Saved from the job itself, so a session started by a refresh mid-run still finds them
+        save_analytics(path, analytics, logs)
+    finally:
+        # Marked as running by the script thread when the job was submitted
+        _running_folders().discard(path)
+    return logs, analytics
+
+
+# --- Persistent Analytics Store ---
+ANALYTICS_TTL_SEC = 24 * 60 * 60
+
+
+@st.cache_resource(show_spinner=False)
+def _analytics_store() -> dict:
+    """Process-wide map of folder path to its last results, read back only via the URL's folder param."""
+    return {}
+
+
+def save_analytics(folder_path, analytics, logs):
+    """Stores results for folder_path and evicts entries older than ANALYTICS_TTL_SEC."""
+    store = _analytics_store()
+    evict_expired(store, ANALYTICS_TTL_SEC)
+    store[folder_path] = {'analytics': analytics, 'logs': logs, 'ts': time.time()}
+
+
+def load_analytics(folder_path):
+    """Returns the stored results for folder_path, or None if missing or expired."""
+    entry = _analytics_store().get(folder_path)
+    if entry and time.time() - entry['ts'] <= ANALYTICS_TTL_SEC:
+        return entry
+    return None
+
+
+# --- Cached Renderers ---
+@st.cache_data(ttl=24*60*60, show_spinner=False)
+def build_report(folder_path, completed_at, total_files, time_taken, duplicates_removed, space_saved_mb, cat_items: tuple, log_items: tuple) -> str:
+    """Builds the downloadable text report, cached per analytics and log contents."""
+    cat_list = ", ".join(f'{k}: {v} files' for k, v in cat_items)
+    
+    parts = [
+        "===  File organazation - Cleaning Report ===",
+        "Date: " + completed_at,
+        "Folder Cleaned: " + folder_path,
+        "----------------------------------------------------",
+        "Total files processed: " + str(total_files),
+        f"Time taken: {time_taken:.2f} seconds",
+        "Duplicates Removed: " + str(duplicates_removed),
+        f"Estimated Space Saved: {space_saved_mb:.2f} MB",
+        "New/Updated Folders: " + cat_list,
+        "================== FULL LOG ==================",
+        *log_items,
+        "==============================================",
+    ]
+    return "\n".join(parts) + "\n"
+
+
+# --- Static Assets ---
+@st.cache_resource
+def load_css():
+    """Reads the dark mode stylesheet from disk once per server process."""
+    return (Path(__file__).parent / ".streamlit" / "style.css").read_text(encoding="utf-8")
+
+
 # Streamlit page configuration
 st.set_page_config(
     page_title="File Organization (Web)", 
@@ -37,65 +186,7 @@ st.set_page_config(
 )
 
 # --- UI Customization (CSS Injection) for Dark Mode ---
-st.markdown("""
-<style>
-/* Dark Mode Background */
-.stApp {
-    background-color: #1e1e2d; /* Dark Blue/Gray */
-    color: #f0f0f0; /* Light Text Color */
-    font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif, "Apple Color Emoji", "Segoe UI Emoji";
-}
-
-/* Center and style the main title */
-.stApp > header {
-    background-color: transparent;
-}
-.css-1ht1j4b { 
-    text-align: center;
-    text-shadow: 2px 2px 5px rgba(0,0,0,0.3);
-    color: #4ecdc4; /* Cyan/Teal Title color */
-}
-
-/* Style main content containers */
-.css-1lcbmhc, .css-1d374r, .stProgress > div > div > div > div {
-    background-color: #2a2a40; /* Slightly lighter dark background for elements */
-    border-radius: 10px;
-    padding: 15px;
-    box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3);
-}
-
-/* Metric labels color adjustment */
-[data-testid="stMetricLabel"] {
-    color: #bdbdbd; 
-}
-
-/* Fix Selectbox, Checkbox labels and Help text color for dark mode */
-.stSelectbox label, .stCheckbox label, .stCheckbox p, .stAlert p {
-    color: #ffffff !important; 
-    font-weight: bold;
-}
-
-/* Style the main action button (ORGANIZE FILES!) */
-div.stButton > button:first-child {
-    background-color: #ff6b6b; /* Reddish color for action button */
-    color: #1e1e2d; /* Dark text on button */
-    border: none;
-    border-radius: 8px;
-    padding: 10px 20px;
-    font-weight: bold;
-    transition: all 0.2s ease-in-out;
-}
-div.stButton > button:first-child:hover {
-    background-color: #ee5253; /* Darker red on hover */
-    transform: translateY(-2px);
-}
-div[data-testid="stDownloadButton"] > button:first-child {
-    background-color: #4ecdc4 !important; /* Cyan/Teal color */
-    color: #1e1e2d !important; /* Dark text */
-    font-weight: bold;
-}
-</style>
-""", unsafe_allow_html=True)
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
 
 # --- UI Header ---
@@ -104,12 +195,27 @@ st.markdown("---")
 
 
 # --- Session State Initialization ---
-if 'folder_path' not in st.session_state:
-    st.session_state['folder_path'] = ""
-if 'last_analytics' not in st.session_state:
-    st.session_state['last_analytics'] = {}
-if 'last_logs' not in st.session_state:
-    st.session_state['last_logs'] = []
+st.session_state.setdefault('last_analytics', {})
+st.session_state.setdefault('last_logs', [])
+st.session_state.setdefault('cleaned_folder_path', 'N/A')
+st.session_state.setdefault('results_restored', False)
+
+# The folder this browser last organized is kept in the URL, so it survives a refresh
+url_folder = st.query_params.get("folder", "")
+st.session_state.setdefault('folder_path', url_folder)
+
+# Restore results only for that folder; typed paths never pull in stored results
+if url_folder and not st.session_state.last_analytics and 'job' not in st.session_state:
+    if url_folder in _running_folders():
+        st.info(f"Organizing `{url_folder}` is still running; its results will show here once it finishes.")
+        st.button("🔄 Check for Results")
+    else:
+        saved = load_analytics(url_folder)
+        if saved:
+            st.session_state['last_analytics'] = saved['analytics']
+            st.session_state['last_logs'] = saved['logs']
+            st.session_state['cleaned_folder_path'] = url_folder
+            st.session_state['results_restored'] = True
 
 
 # --- Button Callback Function ---
@@ -118,7 +224,6 @@ def select_folder_callback():
     selected_path = ask_for_folder_path()
     if selected_path:
         st.session_state.folder_path = selected_path
-        st.rerun() 
 
 
 st.markdown("### 📂 Folder Selection and Options")
@@ -127,25 +232,26 @@ col1, col2 = st.columns([3, 1])
 
 with col1:
     
-    # Folder Select Button using the Tkinter dialog
-    st.button(
-        "📁 Browse Folder (Select Folder)",
-        on_click=select_folder_callback,
-        use_container_width=True
-    )
+    # Folder Select Button using the Tkinter dialog (only where a display is available)
+    if can_open_folder_dialog():
+        st.button(
+            "📁 Browse Folder (Select Folder)",
+            on_click=select_folder_callback,
+            use_container_width=True
+        )
     
-    # Text Input to display and confirm path (Disabled)
-    folder_path_display = st.text_input(
+    # Text Input bound to session state, so a pasted path or a browsed one lands in the same key
+    st.text_input(
         "Selected Folder Path:",
-        value=st.session_state.folder_path,
-        disabled=True 
+        key='folder_path',
+        placeholder="Paste a folder path or use Browse"
     )
     
     # Display current path
     if st.session_state.folder_path:
         st.success(f"**Selected Folder:** `{st.session_state.folder_path}`")
     else:
-        st.warning("Please select a folder to proceed.")
+        st.warning("Please select or paste a folder path to proceed.")
 
 
 # --- Organization Options (unchanged) ---
@@ -155,66 +261,139 @@ with col2:
         "Organization Mode:",
         ['Category Only', 'Category / Year', 'Category / Year-Month'],
         index=0,
+        key='organize_mode',
         help="How files should be organized inside category folders."
     )
     
     check_duplicates = st.checkbox(
         "Find and Remove Duplicates",
         value=True,
+        key='check_duplicates',
         help="Identifies and moves duplicate files to a 'Duplicates' folder."
     )
 
+# Only relevant to the duplicate check
+hash_workers = DEFAULT_HASH_WORKERS
+if check_duplicates:
+    hash_workers = st.sidebar.slider(
+        "Hash workers",
+        1, 16, DEFAULT_HASH_WORKERS,
+        key='hash_workers',
+        help="Threads used to hash small files when finding duplicates."
+    )
+
 st.markdown("---")
 
 # --- 3. Start Button and Process Logic (unchanged) ---
 
-if st.session_state.folder_path and st.button("📁 ORGANIZE FILES!", use_container_width=True):
+def wait_for_job():
+    """Polls the session's organize job in an st.status block, then stores its results.
+
+    The job stays in session_state until its result has been collected, so if a
+    widget interaction interrupts the polling, the next run picks it up again.
+    """
+    job = st.session_state['job']
+    future = job['future']
+    job_state = job['state']
+
+    with st.status("Organizing...", expanded=False) as status:
+        shown_label = None
+        while not future.done():
+            label = f"Organizing... {job_state['percent']}% - {job_state['text']}"
+            if label != shown_label:
+                status.update(label=label)
+                shown_label = label
+            time.sleep(0.1)
+
+        try:
+            logs, analytics = future.result()
+        except Exception as e:
+            del st.session_state['job']
+            status.update(label="❌ Cleaning Failed!", state="error", expanded=False)
+            st.error(f"Error: File organization failed: {e}")
+            return
+        status.update(label="✅ Cleaning Completed!", state="complete", expanded=False)
+
+    # Results render below in this same run, no st.rerun() needed
+    cleaned_path = job['path']
+    st.session_state['last_analytics'] = analytics
+    st.session_state['last_logs'] = logs
+    st.session_state['cleaned_folder_path'] = cleaned_path 
+    st.session_state['results_restored'] = False
+    del st.session_state['job']
+
+
+# Collect a job left pending by an interrupted run before drawing the button,
+# so the button is enabled again as soon as that job has finished
+if 'job' in st.session_state:
+    wait_for_job()
+
+# Also disabled while any session's job is still working in this folder
+organize_disabled = (
+    'job' in st.session_state
+    or st.session_state.folder_path.strip() in _running_folders()
+)
+
+if st.session_state.folder_path and st.button("📁 ORGANIZE FILES!", use_container_width=True, disabled=organize_disabled):
     
-    cleaned_path = st.session_state.folder_path
+    cleaned_path = st.session_state.folder_path.strip()
     
     if not os.path.isdir(cleaned_path):
         st.error(f"Error: Folder path not found or is invalid: {cleaned_path}")
     else:
         st.info("Cleaning process started...")
-        
-        progress_placeholder = st.empty()
-        status_placeholder = st.empty()
-        
+
+        job_state = {"percent": 0, "text": "Starting...", "last_emit": 0.0}
+
         def emit_progress(percent, text):
-            progress_placeholder.progress(percent, text=text)
-            status_placeholder.text(f"Status: {text}")
-
-        with st.spinner('Running file organization logic...'):
-            logs, analytics = organize_files(
-                cleaned_path, 
-                organize_mode,
-                check_duplicates,
-                emit_progress
-            )
-        
-        st.session_state['last_analytics'] = analytics
-        st.session_state['last_logs'] = logs
-        st.session_state['cleaned_folder_path'] = cleaned_path 
-        
-        progress_placeholder.progress(100, text="Completed!")
-        status_placeholder.text("Status: ✅ Cleaning Completed! Running analysis...")
-        st.rerun() 
+            # Throttle to ~10 Hz; the final 100% update always goes through
+            now = time.monotonic()
+            if percent < 100 and now - job_state["last_emit"] < 0.1:
+                return
+            job_state.update(percent=percent, text=text, last_emit=now)
+
+        # Marked before submitting so no other session can start on this folder meanwhile;
+        # run_organize clears the mark when it finishes
+        _running_folders().add(cleaned_path)
+        st.query_params["folder"] = cleaned_path
+
+        # Run in the background so the script thread stays free to update the status
+        future = start_job(
+            run_organize,
+            cleaned_path,
+            organize_mode,
+            check_duplicates,
+            emit_progress,
+            hash_workers
+        )
+        st.session_state['job'] = {'future': future, 'path': cleaned_path, 'state': job_state}
+        wait_for_job()
 
 # --- 4. Results Display (Horizontal Bar Chart Added) ---
 
-if st.session_state.last_analytics:
+@st.fragment
+def render_results():
+    """Renders the summary metrics, category chart, log and report download.
+
+    Runs as a fragment so interactions inside it (e.g. the download button)
+    rerun only this panel instead of the whole page.
+    """
     analytics = st.session_state.last_analytics
     logs = st.session_state.last_logs
     
     st.markdown("### 📊 Cleaning Summary & Analytics")
 
+    if st.session_state.results_restored:
+        st.info(f"Restored results from the last run on `{st.session_state.cleaned_folder_path}`.")
+
     total_files = analytics.get("total_files", 0)
     time_taken = analytics.get("time_taken_sec", 0.0)
     categories = analytics.get("categories", {})
     duplicates_removed = analytics.get("duplicates_removed", 0)
     space_saved_mb = analytics.get("space_saved_bytes", 0) / (1024 * 1024)
     
-    report_folder_path = st.session_state.get('cleaned_folder_path', 'N/A')
+    report_folder_path = st.session_state.cleaned_folder_path
+    completed_at = analytics.get("completed_at", "N/A")
 
     # Display Summary using columns
     summary_col1, summary_col2 = st.columns(2)
@@ -229,40 +408,29 @@ if st.session_state.last_analytics:
         
     st.markdown("---")
 
-    # --- 5. Matplotlib Horizontal Bar Chart ---
+    # --- 5. Horizontal Bar Chart (rendered in the browser) ---
     st.markdown("#### 📊 File Category Distribution")
     
-    plt.style.use('dark_background') 
-
     if categories:
-        # Create DataFrames for easy plotting
-        df = pd.DataFrame(list(categories.items()), columns=['Category', 'Count'])
-        df = df.sort_values('Count', ascending=False)
-        
-        # Determine chart dimensions
-        num_categories = len(categories)
-        fig_height = 2 
-        
-        # Set figure size (width=6, height=2)
-        fig, ax = plt.subplots(figsize=(6, fig_height)) 
-        
-        # Horizontal Bar Plot
-        ax.barh(df['Category'], df['Count'], color=plt.cm.get_cmap('viridis')(range(num_categories)), height=0.5) 
-        
-        # Add count labels next to the bars
-        for index, value in enumerate(df['Count']):
-            ax.text(value, index, f" {value}", va='center', color='white')
-
-        ax.set_xlabel('Number of Files')
-        ax.set_ylabel('File Category')
-        ax.set_title('File Category Distribution by Count', fontsize=12) 
-        
-        plt.tight_layout()
-        st.pyplot(fig)
+        # Imported here so reruns without results skip loading Altair
+        import altair as alt
+
+        data = alt.Data(values=[{'Category': k, 'Count': v} for k, v in categories.items()])
+        base = alt.Chart(data).encode(
+            x=alt.X('Count:Q', title='Number of Files'),
+            y=alt.Y('Category:N', sort='-x', title='File Category')
+        )
+        bars = base.mark_bar(color='#4ecdc4')
+
+        # One text layer labels every bar with its count
+        labels = base.mark_text(align='left', dx=3).encode(text='Count:Q')
+
+        st.altair_chart(
+            (bars + labels).properties(height=max(200, 30 * len(categories))),
+            use_container_width=True
+        )
     else:
         st.info("No files were categorized or moved.")
-    
-    plt.style.use('default') 
 
     # --- 6. Full Log and Export ---
     st.markdown("### 📜 Recent Activity Log")
@@ -271,21 +439,15 @@ if st.session_state.last_analytics:
         st.code("\n".join(logs), language='text')
 
     # Report Content 
-    cat_list = ", ".join(f'{k}: {v} files' for k, v in categories.items())
-    
-    report_content = (
-        "===  File organazation - Cleaning Report ===\n"
-        "Date: " + datetime.now().strftime('%Y-%m-%d %H:%M:%S') + "\n"
-        "Folder Cleaned: " + report_folder_path + "\n"
-        "----------------------------------------------------\n"
-        "Total files processed: " + str(total_files) + "\n"
-        "Time taken: " + f"{time_taken:.2f} seconds\n"
-        "Duplicates Removed: " + str(duplicates_removed) + "\n"
-        "Estimated Space Saved: " + f"{space_saved_mb:.2f} MB\n"
-        "New/Updated Folders: " + cat_list + "\n"
-        "================== FULL LOG ==================\n"
-        + "\n".join(logs) + "\n"
-        "==============================================\n"
+    report_content = build_report(
+        report_folder_path,
+        completed_at,
+        total_files,
+        time_taken,
+        duplicates_removed,
+        space_saved_mb,
+        tuple(categories.items()),
+        tuple(logs)
     )
 
     st.download_button(
@@ -294,3 +456,7 @@ if st.session_state.last_analytics:
         file_name="cleaning_report.txt",
         mime="text/plain"
     )
+
+
+if st.session_state.last_analytics:
+    render_results()
@@ -4,6 +4,7 @@ import time
 import hashlib
 from pathlib import Path
 import mimetypes
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 # Basic categories (you can extend)
@@ -41,6 +42,43 @@ def calculate_hash(filepath, block_size=65536):
     except Exception:
         return None 
 
+# Files up to this size are hashed in parallel; larger ones are read one at a time
+PARALLEL_HASH_MAX_BYTES = 8 * 1024 * 1024
+
+DEFAULT_HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+def hash_files(files, max_workers=DEFAULT_HASH_WORKERS, on_hashed=None):
+    """
+    Returns {file: md5 hex or None} for files.
+    Small files are hashed in a thread pool; large files are hashed sequentially,
+    since parallel reads of big files compete for disk throughput.
+    on_hashed(file, done_count) is called after each file.
+    """
+    small, large = [], []
+    for file in files:
+        try:
+            size = file.stat().st_size
+        except OSError:
+            size = 0
+        (large if size > PARALLEL_HASH_MAX_BYTES else small).append(file)
+
+    hashes = {}
+
+    def record(file, file_hash):
+        hashes[file] = file_hash
+        if on_hashed:
+            on_hashed(file, len(hashes))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(calculate_hash, file): file for file in small}
+        for future in as_completed(futures):
+            record(futures[future], future.result())
+
+    for file in large:
+        record(file, calculate_hash(file))
+
+    return hashes
+
 def get_destination_path(folder: Path, file: Path, category: str, organize_mode: str) -> Path:
     """
     Creates the destination path based on the chosen organization mode.
@@ -64,14 +102,17 @@ def get_destination_path(folder: Path, file: Path, category: str, organize_mode:
     return folder / category
 
 
-def organize_files(folder_path, organize_mode: str, check_duplicates: bool, progress_callback=None):
+def organize_files(folder_path, organize_mode: str, check_duplicates: bool, progress_callback=None,
+                   max_workers: int = DEFAULT_HASH_WORKERS):
     """
     Organize files in folder_path with duplicate removal and advanced mode options.
+    max_workers sets how many threads hash files for the duplicate check.
     """
     start = time.time()
     folder = Path(folder_path)
-    # Exclude folders, and main script files
-    files = [f for f in folder.iterdir() if f.is_file() and f.name not in ["app.py", "organizer.py"]]
+    # Exclude folders, and main script files; scandir reuses the directory entry type instead of a stat per file
+    with os.scandir(folder) as entries:
+        files = [Path(e.path) for e in entries if e.is_file() and e.name not in ["app.py", "organizer.py"]]
     total = len(files)
 
     logs = []
@@ -86,15 +127,32 @@ def organize_files(folder_path, organize_mode: str, check_duplicates: bool, prog
         "time_taken_sec": 0.0,
         "duplicates_removed": 0,
         "space_saved_bytes": 0,
+        "completed_at": "",
         "logs": [] 
     }
 
     if total == 0:
         analytics["time_taken_sec"] = round(time.time() - start, 3)
+        analytics["completed_at"] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         if progress_callback:
             progress_callback(100, "No files to organize")
         return logs, analytics
 
+    # With duplicate checking, the first half of the progress bar covers hashing
+    hash_share = 50 if check_duplicates else 0
+
+    def move_percent(i):
+        return hash_share + int((i / total) * (100 - hash_share))
+
+    # Hash all files up front; moving stays sequential below
+    file_hashes = {}
+    if check_duplicates:
+        def on_hashed(file, done):
+            if progress_callback:
+                progress_callback(int((done / total) * hash_share), f"Hashing {file.name} ({done}/{total})")
+
+        file_hashes = hash_files(files, max_workers, on_hashed)
+
     for i, file in enumerate(files, start=1):
         log_entry = ""
         try:
@@ -104,7 +162,7 @@ def organize_files(folder_path, organize_mode: str, check_duplicates: bool, prog
             
             # --- 1. Duplicate Check Logic ---
             if check_duplicates:
-                file_hash = calculate_hash(file)
+                file_hash = file_hashes[file]
                 if file_hash is None:
                     log_entry = f"Warning: Could not read hash for {file.name}. Skipping duplicate check."
                 elif file_hash in seen_hashes:
@@ -120,7 +178,7 @@ def organize_files(folder_path, organize_mode: str, check_duplicates: bool, prog
                     
                     analytics["logs"].append(log_entry)
                     if progress_callback:
-                        progress_callback(int((i / total) * 100), log_entry)
+                        progress_callback(move_percent(i), log_entry)
                     continue 
                 else:
                     seen_hashes[file_hash] = file.name 
@@ -143,13 +201,13 @@ def organize_files(folder_path, organize_mode: str, check_duplicates: bool, prog
         # Report progress and log
         analytics["logs"].append(log_entry)
         if progress_callback and total:
-            percent = int((i / total) * 100)
-            progress_callback(percent, f"Processing {file.name} ({i}/{total})")
+            progress_callback(move_percent(i), f"Processing {file.name} ({i}/{total})")
 
     # Final analytics update
     analytics["time_taken_sec"] = round(time.time() - start, 3)
     analytics["duplicates_removed"] = duplicate_files
     analytics["space_saved_bytes"] = space_saved_bytes
+    analytics["completed_at"] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
     if progress_callback:
         progress_callback(100, f"Completed — {analytics['total_files']} files organized.")